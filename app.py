@@ -1,11 +1,21 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, g, abort, send_from_directory
 import os
 import random
 import PyPDF2
-from docx import Document
 import re
 from collections import Counter
 import hashlib
+import uuid
+import gzip
+import threading
+from utils.near_duplicates import NearDuplicateIndex
+from utils.profiler import StackSampler, save_profile, recent_profiles
+from utils.docx_stream import iter_docx_blocks
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 app.secret_key = 'docuquest-secret-key-2024'
@@ -13,9 +23,45 @@ UPLOAD_FOLDER = 'uploads'
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Question API paging and compression settings
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MIN_COMPRESS_SIZE = 1024
+BROTLI_QUALITY = 4
+
+# Opt-in request profiling: a sampled fraction of requests, or admins sending the header
+PROFILE_FOLDER = os.environ.get('DOCUQUEST_PROFILE_DIR', 'profiles')
+PROFILE_SAMPLE_RATE = float(os.environ.get('DOCUQUEST_PROFILE_RATE', 0))
+PROFILE_RETENTION = int(os.environ.get('DOCUQUEST_PROFILE_KEEP', 200))
+PROFILE_HEADER = 'X-Docuquest-Profile'
+ADMIN_USERS = {'admin@docuquest.com'}
+
 # Store document analysis in memory
 document_data = {}
 
+# Near-duplicate question banks, one per collection (the uploading user's course
+# bank) and difficulty, each capped so the oldest questions age out
+QUESTION_BANK_SIZE = int(os.environ.get('DOCUQUEST_QUESTION_BANK_SIZE', 50000))
+question_banks = {}
+_question_banks_guard = threading.Lock()
+
+def question_bank_for(collection, difficulty):
+    """Near-duplicate index for one collection and difficulty, created on first use"""
+    with _question_banks_guard:
+        if (collection, difficulty) not in question_banks:
+            question_banks[(collection, difficulty)] = NearDuplicateIndex(max_entries=QUESTION_BANK_SIZE)
+        return question_banks[(collection, difficulty)]
+
+# Question generation checks and then updates shared per-document state, so
+# concurrent requests for one document (threaded workers, ASGI executors) take turns
+_document_locks = {}
+_document_locks_guard = threading.Lock()
+
+def document_lock(document_id):
+    """Lock serializing question generation for one document"""
+    with _document_locks_guard:
+        return _document_locks.setdefault(document_id, threading.Lock())
+
 # Mock user database
 users = {
     'admin@docuquest.com': {'password': 'admin123', 'name': 'Admin User'},
@@ -39,14 +85,9 @@ def extract_text_from_pdf(file_path):
         return ""
 
 def extract_text_from_docx(file_path):
-    """Extract real text from Word documents"""
+    """Extract real text, including headers and table cells, from Word documents"""
     try:
-        doc = Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text += paragraph.text + "\n"
-        return text.strip()
+        return "\n".join(iter_docx_blocks(file_path)).strip()
     except Exception as e:
         print(f"❌ DOCX extraction error: {e}")
         return ""
@@ -164,14 +205,22 @@ def analyze_document_content(text):
     print(f"✅ Analysis complete: {len(content_analysis['key_concepts'])} key concepts, {len(sentences)} sentences")
     return content_analysis
 
-def generate_questions_batch(content_analysis, difficulty, batch_size=10, used_questions=None):
-    """Generate a batch of questions for a specific difficulty"""
+def generate_questions_batch(content_analysis, difficulty, batch_size=10, used_questions=None,
+                             question_bank=None, source=None):
+    """Generate a batch of questions for a specific difficulty
+
+    When a question_bank is given, questions about a concept whose explanation is a
+    near duplicate of one already in the bank for that concept are skipped, so
+    the same evidence is not asked about again through a different template.
+    Generic fallback explanations are not document evidence and never consult the bank.
+    """
     if used_questions is None:
         used_questions = set()
     
     questions = []
     key_concepts = content_analysis['key_concepts']
     sentences = content_analysis['sentences']
+    sentence_set = set(sentences)
     
     print(f"🔧 Generating {batch_size} {difficulty} questions from {len(key_concepts)} concepts")
     
@@ -224,6 +273,11 @@ def generate_questions_batch(content_analysis, difficulty, batch_size=10, used_q
             options = distractors + [concept]
             random.shuffle(options)
             
+            # Skip paraphrased repeats already in the question bank
+            if (question_bank is not None and explanation in sentence_set
+                    and not question_bank.add(explanation, key=concept, source=source)):
+                continue
+            
             questions.append({
                 'question': question_text,
                 'answer': concept,
@@ -273,6 +327,11 @@ def generate_questions_batch(content_analysis, difficulty, batch_size=10, used_q
             options = distractors + [concept]
             random.shuffle(options)
             
+            # Skip paraphrased repeats already in the question bank
+            if (question_bank is not None and explanation in sentence_set
+                    and not question_bank.add(explanation, key=concept, source=source)):
+                continue
+            
             questions.append({
                 'question': question_text,
                 'answer': concept,
@@ -325,6 +384,11 @@ def generate_questions_batch(content_analysis, difficulty, batch_size=10, used_q
             options = distractors + [concept]
             random.shuffle(options)
             
+            # Skip paraphrased repeats already in the question bank
+            if (question_bank is not None and explanation in sentence_set
+                    and not question_bank.add(explanation, key=concept, source=source)):
+                continue
+            
             questions.append({
                 'question': question_text,
                 'answer': concept,
@@ -338,10 +402,28 @@ def generate_questions_batch(content_analysis, difficulty, batch_size=10, used_q
     print(f"✅ Generated {len(questions)} {difficulty} questions")
     return questions
 
-def initialize_document_questions(content_analysis, document_id):
-    """Initialize questions for all difficulty levels"""
-    document_data[document_id] = {
+def initialize_document_questions(content_analysis, document_id, collection=None):
+    """Initialize questions for all difficulty levels
+
+    With a collection, the first batches skip questions that repeat evidence
+    already in that collection's question bank.
+    """
+    with document_lock(document_id):
+        _initialize_document_questions(content_analysis, document_id, collection)
+
+def _initialize_document_questions(content_analysis, document_id, collection):
+    banks = {}
+    if collection is not None:
+        banks = {d: question_bank_for(collection, d) for d in ['basic', 'medium', 'advanced']}
+        # A re-uploaded document should not be blocked by its own earlier questions
+        for bank in banks.values():
+            bank.discard_source(document_id)
+    
+    # Built aside and published at the end so readers never see a half-initialized entry
+    entry = {
         'content_analysis': content_analysis,
+        # Changes on every (re)initialization so ETags never outlive the questions they describe
+        'nonce': uuid.uuid4().hex[:8],
         'used_questions': {
             'basic': set(),
             'medium': set(),
@@ -352,6 +434,11 @@ def initialize_document_questions(content_analysis, document_id):
             'medium': [],
             'advanced': []
         },
+        'versions': {
+            'basic': 0,
+            'medium': 0,
+            'advanced': 0
+        },
         'stats': {
             'word_count': len(content_analysis['full_text'].split()),
             'sentence_count': len(content_analysis['sentences']),
@@ -366,13 +453,170 @@ def initialize_document_questions(content_analysis, document_id):
             content_analysis, 
             difficulty, 
             batch_size=10,
-            used_questions=document_data[document_id]['used_questions'][difficulty]
+            used_questions=entry['used_questions'][difficulty],
+            question_bank=banks.get(difficulty),
+            source=document_id
+        )
+        entry['generated_questions'][difficulty] = new_questions
+        entry['versions'][difficulty] += 1
+        for q in new_questions:
+            entry['used_questions'][difficulty].add(q['question'])
+    
+    document_data[document_id] = entry
+    print(f"🎯 Initialized {sum(len(q) for q in entry['generated_questions'].values())} total questions")
+
+def parse_page_args(args):
+    """Read cursor/limit query parameters, falling back to sane defaults"""
+    try:
+        cursor = max(int(args.get('cursor', 0)), 0)
+    except (TypeError, ValueError):
+        cursor = 0
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        limit = DEFAULT_PAGE_SIZE
+    return cursor, min(max(limit, 1), MAX_PAGE_SIZE)
+
+def should_compress(response):
+    """Only successful, not yet encoded JSON bodies are worth compressing"""
+    return (response.status_code == 200
+            and response.mimetype == 'application/json'
+            and 'Content-Encoding' not in response.headers)
+
+def compress_body(data, accept_encodings):
+    """Compress a large body with brotli or gzip; returns (data, encoding or None)"""
+    if len(data) < MIN_COMPRESS_SIZE:
+        return data, None
+    if brotli is not None and accept_encodings['br']:
+        # Low quality keeps brotli's CPU cost close to gzip's
+        return brotli.compress(data, quality=BROTLI_QUALITY), 'br'
+    if accept_encodings['gzip']:
+        return gzip.compress(data, compresslevel=6), 'gzip'
+    return data, None
+
+def compress_response(response):
+    """Compress large JSON responses when the client accepts it"""
+    if response.direct_passthrough or not should_compress(response):
+        return response
+    
+    data, encoding = compress_body(response.get_data(), request.accept_encodings)
+    if encoding:
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+    return response
+
+def question_page(document_id, difficulty, args):
+    """Build the ETag and JSON payload for one page of stored questions"""
+    # Read the entry once: a re-initialization may publish a new one meanwhile
+    entry = document_data[document_id]
+    questions = entry['generated_questions'].get(difficulty, [])
+    version = entry['versions'].get(difficulty, 0)
+    nonce = entry['nonce']
+    cursor, limit = parse_page_args(args)
+    
+    # The question list only ever grows, so the initialization nonce, version and page
+    # bounds identify the body. Sent as a weak tag since gzip/brotli/identity bodies share it.
+    etag = f"{document_id}-{nonce}-{difficulty}-v{version}-{cursor}-{limit}"
+    page = questions[cursor:cursor + limit]
+    next_cursor = cursor + len(page) if cursor + len(page) < len(questions) else None
+    return etag, {
+        'success': True,
+        'questions': page,
+        'count': len(page),
+        'total_count': len(questions),
+        'next_cursor': next_cursor,
+        'has_more': len(entry['content_analysis']['key_concepts']) > 0
+    }
+
+def generate_more_questions(document_id, difficulty):
+    """Generate and store another batch of questions, returning the JSON payload"""
+    with document_lock(document_id):
+        entry = document_data[document_id]
+        content_analysis = entry['content_analysis']
+        used_questions = entry['used_questions'][difficulty]
+        
+        # The question bank only screens a document's first batches; asking for more
+        # means new templates over the same evidence, which exact dedup already covers
+        new_questions = generate_questions_batch(
+            content_analysis,
+            difficulty,
+            batch_size=5,
+            used_questions=used_questions
         )
-        document_data[document_id]['generated_questions'][difficulty] = new_questions
+        
+        # Add new questions to stored questions
+        entry['generated_questions'][difficulty].extend(new_questions)
+        if new_questions:
+            entry['versions'][difficulty] += 1
         for q in new_questions:
-            document_data[document_id]['used_questions'][difficulty].add(q['question'])
+            used_questions.add(q['question'])
+        total_count = len(entry['generated_questions'][difficulty])
+        has_more = len(content_analysis['key_concepts']) > len(used_questions) / 3
+    
+    print(f"✅ Generated {len(new_questions)} new questions for {difficulty} level")
     
-    print(f"🎯 Initialized {sum(len(q) for q in document_data[document_id]['generated_questions'].values())} total questions")
+    return {
+        'success': True,
+        'new_questions': new_questions,
+        'total_count': total_count,
+        'has_more': has_more
+    }
+
+def extract_and_analyze(file_path):
+    """Extract and analyze a saved upload, removing the file afterwards
+
+    Returns (document_id, content_analysis), or (None, None) when the document
+    has too little readable text. Only depends on its arguments, so it can run
+    in a worker process.
+    """
+    text = extract_text(file_path)
+    print(f"📝 Text length: {len(text)}")
+    
+    try:
+        if not text or len(text.strip()) <= 50:
+            return None, None
+        content_analysis = analyze_document_content(text)
+        document_id = hashlib.md5(text.encode()).hexdigest()[:10]
+        return document_id, content_analysis
+    finally:
+        # Clean up uploaded file
+        try:
+            os.remove(file_path)
+            print("🗑 Temporary file cleaned up")
+        except:
+            pass
+
+@app.after_request
+def after_request(response):
+    return compress_response(response)
+
+def is_admin():
+    return session.get('user') in ADMIN_USERS
+
+@app.before_request
+def start_profiling():
+    """Start a stack sampler for sampled requests or admin requests asking for one"""
+    if request.endpoint in ('profiles', 'profile_file'):
+        return
+    wanted = (request.headers.get(PROFILE_HEADER) and is_admin()) or random.random() < PROFILE_SAMPLE_RATE
+    if wanted:
+        g.profiler = StackSampler(threading.get_ident())
+        g.profiler.start()
+
+@app.teardown_request
+def stop_profiling(exc):
+    """Save the profile of the finished request under the profiles folder"""
+    sampler = g.pop('profiler', None)
+    if sampler is None:
+        return
+    sampler.stop()
+    route = request.url_rule.rule if request.url_rule else request.path
+    try:
+        entry = save_profile(sampler, PROFILE_FOLDER, route, keep=PROFILE_RETENTION)
+        print(f"⏱ Profiled {route} in {entry['duration_ms']}ms -> {entry['file']}")
+    except OSError as e:
+        print(f"❌ Profile save error: {e}")
 
 # Routes
 @app.route("/")
@@ -431,25 +675,13 @@ def analyzer():
             file.save(file_path)
             print("💾 File saved successfully")
             
-            text = extract_text(file_path)
-            print(f"📝 Text length: {len(text)}")
+            document_id, content_analysis = extract_and_analyze(file_path)
             
-            if text and len(text.strip()) > 50:
-                content_analysis = analyze_document_content(text)
-                
-                document_id = hashlib.md5(text.encode()).hexdigest()[:10]
-                
-                initialize_document_questions(content_analysis, document_id)
+            if document_id:
+                initialize_document_questions(content_analysis, document_id, collection=session['user'])
                 
                 print(f"✅ Document analysis complete. Document ID: {document_id}")
                 
-                # Clean up uploaded file
-                try:
-                    os.remove(file_path)
-                    print("🗑 Temporary file cleaned up")
-                except:
-                    pass
-                
                 return render_template("index.html", 
                                      document_id=document_id,
                                      document_stats=document_data[document_id]['stats'],
@@ -466,20 +698,24 @@ def analyzer():
 
 @app.route("/get_questions/<document_id>/<difficulty>")
 def get_questions(document_id, difficulty):
-    """Get questions for a specific difficulty"""
+    """Get a page of questions for a specific difficulty"""
     global document_data
     
     print(f"🔍 Fetching questions for document {document_id}, difficulty {difficulty}")
     
     if document_id in document_data:
-        questions = document_data[document_id]['generated_questions'].get(difficulty, [])
-        print(f"✅ Found {len(questions)} questions for {difficulty} level")
-        return jsonify({
-            'success': True,
-            'questions': questions,
-            'count': len(questions),
-            'has_more': len(document_data[document_id]['content_analysis']['key_concepts']) > 0
-        })
+        etag, payload = question_page(document_id, difficulty, request.args)
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        
+        print(f"✅ Found {payload['total_count']} questions for {difficulty} level, returning {payload['count']}")
+        response = jsonify(payload)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     else:
         print(f"❌ Document {document_id} not found")
         return jsonify({
@@ -495,35 +731,30 @@ def more_questions(document_id, difficulty):
     print(f"🔍 Generating more questions for document {document_id}, difficulty {difficulty}")
     
     if document_id in document_data:
-        content_analysis = document_data[document_id]['content_analysis']
-        used_questions = document_data[document_id]['used_questions'][difficulty]
-        
-        new_questions = generate_questions_batch(
-            content_analysis,
-            difficulty,
-            batch_size=5,
-            used_questions=used_questions
-        )
-        
-        # Add new questions to stored questions
-        document_data[document_id]['generated_questions'][difficulty].extend(new_questions)
-        for q in new_questions:
-            used_questions.add(q['question'])
-        
-        print(f"✅ Generated {len(new_questions)} new questions for {difficulty} level")
-        
-        return jsonify({
-            'success': True,
-            'new_questions': new_questions,
-            'total_count': len(document_data[document_id]['generated_questions'][difficulty]),
-            'has_more': len(content_analysis['key_concepts']) > len(used_questions) / 3
-        })
+        return jsonify(generate_more_questions(document_id, difficulty))
     else:
         return jsonify({
             'success': False,
             'error': 'Document not found'
         })
 
+@app.route("/profiles")
+def profiles():
+    """List recent request profiles (admin only)"""
+    if not is_admin():
+        abort(403)
+    return jsonify({
+        'success': True,
+        'profiles': recent_profiles(PROFILE_FOLDER)
+    })
+
+@app.route("/profiles/<path:filename>")
+def profile_file(filename):
+    """Download a collapsed-stack profile (admin only)"""
+    if not is_admin():
+        abort(403)
+    return send_from_directory(os.path.abspath(PROFILE_FOLDER), filename, mimetype='text/plain')
+
 # Feature Pages
 @app.route('/feature/unlimited-questions')
 def unlimited_questions():
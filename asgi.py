@@ -0,0 +1,206 @@
+"""Async serving mode for DOCUQUEST.
+
+Serves the user-facing pages and question API of app.py with async handlers
+under an ASGI server, e.g. ``uvicorn asgi:app``. Text extraction and analysis
+run in a process pool; question generation, JSON serialization of question
+pages and response compression run in a thread pool. Only lookups, ETag checks
+and page rendering stay on the event loop, so fetches keep being served while
+large uploads are analyzed.
+
+Request profiling and the /profiles routes are only available in the sync app:
+its sampler follows the thread handling a request, while here requests share
+the event loop thread.
+"""
+import asyncio
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from quart import Quart, render_template, request, jsonify, redirect, url_for, session
+
+import app as core
+
+app = Quart(__name__)
+app.secret_key = core.app.secret_key
+app.config['UPLOAD_FOLDER'] = core.UPLOAD_FOLDER
+
+# Executor sizes for the CPU-heavy parts of the upload path
+ANALYSIS_PROCESSES = int(os.environ.get('DOCUQUEST_ANALYSIS_PROCESSES', os.cpu_count() or 2))
+GENERATION_THREADS = int(os.environ.get('DOCUQUEST_GENERATION_THREADS', 4))
+
+executors = {}
+
+@app.before_serving
+async def start_executors():
+    executors['analysis'] = ProcessPoolExecutor(max_workers=ANALYSIS_PROCESSES)
+    executors['generation'] = ThreadPoolExecutor(max_workers=GENERATION_THREADS)
+
+@app.after_serving
+async def stop_executors():
+    for executor in executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    executors.clear()
+
+async def run_in(executor_name, func, *args):
+    """Run a blocking call in one of the executors without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executors[executor_name], func, *args)
+
+@app.after_request
+async def after_request(response):
+    """Compress large JSON responses when the client accepts it"""
+    if not core.should_compress(response):
+        return response
+
+    data = await response.get_data()
+    if len(data) < core.MIN_COMPRESS_SIZE:
+        return response
+
+    # Compression is CPU work; keep it off the event loop
+    data, encoding = await run_in('generation', core.compress_body, data, request.accept_encodings)
+    if encoding:
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+    return response
+
+# Routes
+@app.route("/")
+async def home():
+    """Home page"""
+    return await render_template("home.html")
+
+@app.route("/login", methods=["GET", "POST"])
+async def login():
+    """Login page"""
+    if request.method == "POST":
+        form = await request.form
+        email = form.get('email')
+        password = form.get('password')
+
+        # Basic validation
+        if not email or not password:
+            return await render_template("login.html", error="Please enter both email and password")
+
+        if email in core.users and core.users[email]['password'] == password:
+            session['user'] = email
+            session['user_name'] = core.users[email]['name']
+            return redirect(url_for('analyzer'))
+        else:
+            return await render_template("login.html", error="Invalid email or password. Please try again.")
+
+    return await render_template("login.html")
+
+@app.route("/logout")
+async def logout():
+    """Logout user"""
+    session.pop('user', None)
+    session.pop('user_name', None)
+    return redirect(url_for('home'))
+
+@app.route("/analyzer", methods=["GET", "POST"])
+async def analyzer():
+    """Main analyzer application"""
+    # Check if user is logged in
+    if 'user' not in session:
+        return redirect(url_for('login'))
+
+    if request.method == "POST":
+        print("📥 Form submitted!")
+
+        files = await request.files
+        file = files.get("document")
+
+        if file and file.filename:
+            print(f"📄 Processing file: {file.filename}")
+
+            # Ensure uploads directory exists
+            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+            # Concurrent uploads of the same file name must not share a path
+            file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex[:8]}-{file.filename}")
+            await file.save(file_path)
+            print("💾 File saved successfully")
+
+            document_id, content_analysis = await run_in('analysis', core.extract_and_analyze, file_path)
+
+            if document_id:
+                await run_in('generation', core.initialize_document_questions,
+                             content_analysis, document_id, session['user'])
+
+                print(f"✅ Document analysis complete. Document ID: {document_id}")
+
+                return await render_template("index.html",
+                                             document_id=document_id,
+                                             document_stats=core.document_data[document_id]['stats'],
+                                             user_name=session.get('user_name'))
+            else:
+                error = "❌ The document doesn't contain enough readable text. Please try a different file."
+                return await render_template("index.html", error=error, user_name=session.get('user_name'))
+        else:
+            error = "❌ Please select a file to upload."
+            return await render_template("index.html", error=error, user_name=session.get('user_name'))
+
+    # GET request - show empty form
+    return await render_template("index.html", user_name=session.get('user_name'))
+
+@app.route("/get_questions/<document_id>/<difficulty>")
+async def get_questions(document_id, difficulty):
+    """Get a page of questions for a specific difficulty, served on the event loop"""
+    if document_id in core.document_data:
+        etag, payload = core.question_page(document_id, difficulty, request.args)
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class("", status=304)
+        else:
+            # Serializing a large page is CPU work; only the lookup stays on the event loop
+            body = await run_in('generation', json.dumps, payload)
+            response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    else:
+        return jsonify({
+            'success': False,
+            'error': 'Document not found. Please upload the document again.'
+        })
+
+@app.route("/more_questions/<document_id>/<difficulty>")
+async def more_questions(document_id, difficulty):
+    """Generate more questions for a specific difficulty"""
+    if document_id in core.document_data:
+        return jsonify(await run_in('generation', core.generate_more_questions, document_id, difficulty))
+    else:
+        return jsonify({
+            'success': False,
+            'error': 'Document not found'
+        })
+
+# Feature Pages
+@app.route('/feature/unlimited-questions')
+async def unlimited_questions():
+    if 'user' not in session:
+        return redirect(url_for('login'))
+    return await render_template('unlimited_questions.html', user_name=session.get('user_name'))
+
+@app.route('/feature/three-levels')
+async def three_levels():
+    if 'user' not in session:
+        return redirect(url_for('login'))
+    return await render_template('three_levels.html', user_name=session.get('user_name'))
+
+@app.route('/feature/real-time-generation')
+async def real_time_generation():
+    if 'user' not in session:
+        return redirect(url_for('login'))
+    return await render_template('real_time_generation.html', user_name=session.get('user_name'))
+
+@app.route('/feature/dynamic-generation')
+async def dynamic_generation():
+    if 'user' not in session:
+        return redirect(url_for('login'))
+    return await render_template('dynamic_generation.html', user_name=session.get('user_name'))
+
+if __name__ == "__main__":
+    print("🚀 Starting DOCUQUEST in async mode...")
+    app.run(host='0.0.0.0', port=8000)
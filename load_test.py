@@ -0,0 +1,398 @@
+"""Load generator that replays realistic DOCUQUEST user sessions.
+
+Each session logs in, uploads a document drawn from a corpus to /analyzer,
+fetches questions for all three difficulties and then asks for more questions
+a few times. Sessions run either in-process through Flask's test client or
+over HTTP against a running server (optionally a gunicorn started here).
+
+Examples:
+    python load_test.py --sessions 50 --concurrency 10
+    python load_test.py --rate 2 --duration 60 --gunicorn-workers 4
+    python load_test.py --sweep 1,5,10,20 --sessions 40
+    python load_test.py --base-url http://localhost:8000 --worker-pid 1234
+"""
+import argparse
+import io
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+DIFFICULTIES = ['basic', 'medium', 'advanced']
+DEFAULT_CORPUS = ['uploads', 'test_document.txt', 'test_simple.txt']
+DEFAULT_USER = ('test@docuquest.com', 'test123')
+DOCUMENT_ID_PATTERN = re.compile(r'const documentId = "([^"]*)"')
+
+
+def load_corpus(paths):
+    """Read every supported document under the given files/directories into memory"""
+    corpus = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.path.join(path, name) for name in os.listdir(path))
+        else:
+            names = [path]
+        for name in names:
+            if os.path.isfile(name) and name.lower().endswith(SUPPORTED_EXTENSIONS):
+                with open(name, 'rb') as f:
+                    corpus.append((os.path.basename(name), f.read()))
+    return corpus
+
+
+class TestClientTransport:
+    """Drives the Flask app in-process; one client per session keeps cookies apart"""
+
+    def __init__(self):
+        from app import app
+        self.app = app
+
+    def new_session(self):
+        client = self.app.test_client()
+
+        def send(method, path, data=None, files=None):
+            if files:
+                data = dict(data or {})
+                for field, (filename, content) in files.items():
+                    data[field] = (io.BytesIO(content), filename)
+            response = client.open(path, method=method, data=data)
+            return response.status_code, response.get_data(as_text=True)
+
+        return send
+
+
+class HttpTransport:
+    """Drives a running server over HTTP with one requests.Session per user session"""
+
+    def __init__(self, base_url, timeout=300):
+        import requests
+        self.requests = requests
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def new_session(self):
+        http = self.requests.Session()
+
+        def send(method, path, data=None, files=None):
+            response = http.request(method, self.base_url + path, data=data, files=files,
+                                    allow_redirects=False, timeout=self.timeout)
+            return response.status_code, response.text
+
+        return send
+
+
+class Metrics:
+    """Thread-safe latency and error bookkeeping per route"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.sessions = []
+        self.lock = threading.Lock()
+
+    def record(self, route, seconds, ok):
+        with self.lock:
+            self.latencies[route].append(seconds)
+            if not ok:
+                self.errors[route] += 1
+
+    def record_session(self, seconds):
+        with self.lock:
+            self.sessions.append(seconds)
+
+    def total_requests(self):
+        return sum(len(values) for values in self.latencies.values())
+
+    def total_errors(self):
+        return sum(self.errors.values())
+
+
+class RssSampler(threading.Thread):
+    """Periodically sums the resident set size of the target processes and their children"""
+
+    def __init__(self, pids, interval=1.0):
+        super().__init__(daemon=True)
+        self.pids = pids
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    @staticmethod
+    def _children(pid):
+        children = []
+        task_dir = f'/proc/{pid}/task'
+        try:
+            for tid in os.listdir(task_dir):
+                with open(os.path.join(task_dir, tid, 'children')) as f:
+                    children.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+        return children
+
+    @staticmethod
+    def _rss_kb(pid):
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return 0
+
+    def rss_kb(self):
+        seen = set()
+        pending = list(self.pids)
+        total = 0
+        while pending:
+            pid = pending.pop()
+            if pid in seen:
+                continue
+            seen.add(pid)
+            total += self._rss_kb(pid)
+            pending.extend(self._children(pid))
+        return total
+
+    def run(self):
+        start = time.time()
+        while not self.stopped.is_set():
+            self.samples.append((time.time() - start, self.rss_kb()))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.samples.append((self.samples[-1][0] if self.samples else 0.0, self.rss_kb()))
+
+
+def document_id_from(body):
+    """Pull the document id out of the rendered analyzer page"""
+    match = DOCUMENT_ID_PATTERN.search(body or '')
+    if not match or match.group(1) in ('', 'None'):
+        return None
+    return match.group(1)
+
+
+def timed(metrics, route, send, method, path, data=None, files=None, check=None, start=None):
+    """Issue one request and record its latency; returns the body or None on failure
+
+    start defaults to now; pass an earlier perf_counter() value to include time the
+    request spent waiting to be sent.
+    """
+    if start is None:
+        start = time.perf_counter()
+    try:
+        status, body = send(method, path, data=data, files=files)
+        ok = status < 400 and '"success": false' not in body and '"success":false' not in body
+        if ok and check is not None:
+            ok = check(body)
+    except Exception as e:
+        print(f"❌ {route} failed: {e}")
+        body, ok = None, False
+    metrics.record(route, time.perf_counter() - start, ok)
+    return body if ok else None
+
+
+def run_session(transport, corpus, metrics, more_rounds, credentials, scheduled=None):
+    """Replay one user session end to end
+
+    scheduled is the perf_counter() time the session was meant to arrive. Session
+    and first-request latency are measured from it, so time queued behind busy
+    workers is reported instead of hidden (coordinated omission).
+    """
+    if scheduled is None:
+        scheduled = time.perf_counter()
+    try:
+        _replay_session(transport, corpus, metrics, more_rounds, credentials, scheduled)
+    finally:
+        metrics.record_session(time.perf_counter() - scheduled)
+
+
+def _replay_session(transport, corpus, metrics, more_rounds, credentials, scheduled):
+    send = transport.new_session()
+    email, password = credentials
+
+    if timed(metrics, '/login', send, 'POST', '/login',
+             data={'email': email, 'password': password}, start=scheduled) is None:
+        return
+
+    # Unique upload names so concurrent sessions never overwrite each other's file
+    filename, content = random.choice(corpus)
+    upload_name = f"loadtest-{uuid.uuid4().hex[:8]}-{filename}"
+    body = timed(metrics, '/analyzer', send, 'POST', '/analyzer',
+                 files={'document': (upload_name, content)},
+                 check=lambda text: document_id_from(text) is not None)
+    if body is None:
+        return
+    document_id = document_id_from(body)
+
+    for difficulty in DIFFICULTIES:
+        timed(metrics, '/get_questions', send, 'GET', f'/get_questions/{document_id}/{difficulty}')
+
+    for _ in range(more_rounds):
+        difficulty = random.choice(DIFFICULTIES)
+        timed(metrics, '/more_questions', send, 'GET', f'/more_questions/{document_id}/{difficulty}')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_load(transport, corpus, args, concurrency):
+    """Run one load level and return its metrics and wall time"""
+    metrics = Metrics()
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if args.rate > 0:
+            # Open model: Poisson arrivals at the requested rate for the requested duration
+            # Each session carries its scheduled arrival so pool queueing counts as latency
+            futures = []
+            first_arrival = next_arrival = time.perf_counter()
+            while next_arrival - first_arrival < args.duration:
+                time.sleep(max(0.0, next_arrival - time.perf_counter()))
+                futures.append(pool.submit(run_session, transport, corpus, metrics,
+                                           args.more_rounds, args.credentials, next_arrival))
+                next_arrival += random.expovariate(args.rate)
+        else:
+            # Closed model: a fixed number of sessions, concurrency at a time
+            futures = [
+                pool.submit(run_session, transport, corpus, metrics, args.more_rounds, args.credentials)
+                for _ in range(args.sessions)
+            ]
+        for future in futures:
+            future.result()
+    return metrics, time.time() - start
+
+
+def print_report(concurrency, metrics, elapsed, sampler):
+    """Print per-route latency percentiles, throughput, error rate and RSS"""
+    total = metrics.total_requests()
+    errors = metrics.total_errors()
+    print(f"\n📊 Concurrency {concurrency}: {total} requests in {elapsed:.1f}s "
+          f"({total / elapsed if elapsed else 0:.1f} req/s), "
+          f"error rate {100.0 * errors / total if total else 0:.1f}%")
+    print(f"{'route':<18}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route in sorted(metrics.latencies):
+        values = metrics.latencies[route]
+        print(f"{route:<18}{len(values):>7}{metrics.errors[route]:>8}"
+              f"{percentile(values, 50) * 1000:>10.1f}"
+              f"{percentile(values, 95) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}")
+    if metrics.sessions:
+        print(f"{'session':<18}{len(metrics.sessions):>7}{'':>8}"
+              f"{percentile(metrics.sessions, 50) * 1000:>10.1f}"
+              f"{percentile(metrics.sessions, 95) * 1000:>10.1f}"
+              f"{percentile(metrics.sessions, 99) * 1000:>10.1f}")
+    if sampler and sampler.samples:
+        rss_values = [rss for _, rss in sampler.samples]
+        print(f"💾 Worker RSS: start {rss_values[0] / 1024:.1f} MB, "
+              f"peak {max(rss_values) / 1024:.1f} MB, end {rss_values[-1] / 1024:.1f} MB")
+        print("   " + ", ".join(f"{t:.0f}s={rss / 1024:.0f}MB" for t, rss in sampler.samples))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers):
+    """Start gunicorn serving app:app locally and wait until it accepts connections"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '-w', str(workers),
+         '-b', f'127.0.0.1:{port}', '--timeout', '300'],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay DOCUQUEST user sessions under load")
+    parser.add_argument('--base-url', help="Target a running server instead of the in-process test client")
+    parser.add_argument('--gunicorn-workers', type=int, default=0,
+                        help="Start a local gunicorn with this many workers and target it")
+    parser.add_argument('--worker-pid', type=int, action='append', default=[],
+                        help="Process to sample RSS from (children included); repeatable")
+    parser.add_argument('--corpus', nargs='+', default=DEFAULT_CORPUS,
+                        help="Files or directories of documents to upload")
+    parser.add_argument('--concurrency', type=int, default=10, help="Concurrent sessions")
+    parser.add_argument('--sweep', help="Comma-separated concurrency levels to run in turn")
+    parser.add_argument('--sessions', type=int, default=20, help="Sessions per level (closed model)")
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help="Session arrivals per second (open model); 0 uses --sessions")
+    parser.add_argument('--duration', type=float, default=60.0, help="Seconds of arrivals in open model")
+    parser.add_argument('--more-rounds', type=int, default=3, help="/more_questions calls per session")
+    parser.add_argument('--rss-interval', type=float, default=1.0, help="Seconds between RSS samples")
+    parser.add_argument('--seed', type=int, help="Random seed for reproducible runs")
+    args = parser.parse_args(argv)
+    args.credentials = DEFAULT_USER
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print("❌ No .pdf, .docx or .txt documents found in the corpus")
+        return 1
+    print(f"📚 Loaded {len(corpus)} corpus documents")
+
+    gunicorn = None
+    pids = list(args.worker_pid)
+    if args.gunicorn_workers:
+        gunicorn, base_url = start_gunicorn(args.gunicorn_workers)
+        pids.append(gunicorn.pid)
+        transport = HttpTransport(base_url)
+        print(f"🚀 gunicorn with {args.gunicorn_workers} workers at {base_url}")
+    elif args.base_url:
+        transport = HttpTransport(args.base_url)
+    else:
+        transport = TestClientTransport()
+        pids.append(os.getpid())
+
+    levels = [int(level) for level in args.sweep.split(',')] if args.sweep else [args.concurrency]
+    try:
+        for concurrency in levels:
+            sampler = RssSampler(pids, args.rss_interval) if pids else None
+            if sampler:
+                sampler.start()
+            metrics, elapsed = run_load(transport, corpus, args, concurrency)
+            if sampler:
+                sampler.stop()
+            print_report(concurrency, metrics, elapsed, sampler)
+    finally:
+        if gunicorn:
+            gunicorn.terminate()
+            gunicorn.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import zipfile
+
+from utils.docx_stream import iter_docx_blocks
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml"'
+)
+
+
+def paragraph(text):
+    return f'<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr><w:r><w:t>{text}</w:t></w:r></w:p>'
+
+
+def cell(*content):
+    return '<w:tc>' + ''.join(content) + '</w:tc>'
+
+
+def table(*rows):
+    return '<w:tbl>' + ''.join('<w:tr>' + ''.join(row) + '</w:tr>' for row in rows) + '</w:tbl>'
+
+
+TEXT_BOX = (
+    '<w:p><w:r><mc:AlternateContent>'
+    '<mc:Choice Requires="wps"><w:drawing><wps:txbx><w:txbxContent>'
+    + paragraph('Boxed definition') +
+    '</w:txbxContent></wps:txbx></w:drawing></mc:Choice>'
+    '<mc:Fallback><w:pict><v:textbox><w:txbxContent>'
+    + paragraph('Boxed definition') +
+    '</w:txbxContent></v:textbox></w:pict></mc:Fallback>'
+    '</mc:AlternateContent></w:r><w:r><w:t>After box</w:t></w:r></w:p>'
+)
+
+
+def write_docx(path, body, headers=None):
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml',
+                         f'<w:document {NAMESPACES}><w:body>{body}</w:body></w:document>')
+        for name, text in (headers or {}).items():
+            archive.writestr(f'word/{name}', f'<w:hdr {NAMESPACES}>{paragraph(text)}</w:hdr>')
+
+
+def test_paragraphs_and_tables_in_document_order(tmp_path):
+    path = tmp_path / 'tables.docx'
+    nested = table([cell(paragraph('Inner A')), cell(paragraph('Inner B'))])
+    write_docx(path, paragraph('Intro')
+               + table([cell(paragraph('Term')), cell(paragraph('Meaning'), paragraph('more'))],
+                       [cell(paragraph('Outer'), nested), cell(paragraph(''))])
+               + paragraph('Outro'))
+
+    assert list(iter_docx_blocks(path)) == [
+        'Intro', 'Term', 'Meaning more', 'Outer Inner A Inner B', 'Outro'
+    ]
+
+
+def test_text_box_is_read_once(tmp_path):
+    path = tmp_path / 'textbox.docx'
+    write_docx(path, TEXT_BOX)
+
+    assert list(iter_docx_blocks(path)) == ['Boxed definition', 'After box']
+
+
+def test_headers_come_first_in_numeric_order(tmp_path):
+    path = tmp_path / 'headers.docx'
+    write_docx(path, paragraph('Body'),
+               headers={'header10.xml': 'Ten', 'header2.xml': 'Two', 'header1.xml': 'One'})
+
+    assert list(iter_docx_blocks(path)) == ['One', 'Two', 'Ten', 'Body']
@@ -0,0 +1,63 @@
+import random
+
+from utils.near_duplicates import NearDuplicateIndex
+
+EXPLANATION = ("Neural networks are computing systems inspired by the biological neural "
+               "networks that constitute animal brains and learn to perform tasks")
+
+
+def test_same_concept_and_explanation_is_duplicate():
+    index = NearDuplicateIndex()
+    assert index.add(EXPLANATION, key='Neural')
+    assert not index.add(EXPLANATION, key='neural')
+
+
+def test_lightly_reworded_explanation_is_duplicate():
+    index = NearDuplicateIndex()
+    assert index.add(EXPLANATION, key='Neural')
+    reworded = EXPLANATION.replace('computing systems', 'computer systems')
+    assert index.is_near_duplicate(reworded, key='Neural')
+
+
+def test_different_concepts_with_shared_fallback_are_kept():
+    index = NearDuplicateIndex()
+    for concept in ['Network', 'Protocol', 'Packet', 'Router', 'Switch']:
+        fallback = f"The document discusses {concept} and its importance in the context."
+        assert index.add(fallback, key=concept)
+
+
+def test_different_concepts_with_same_sentence_are_kept():
+    index = NearDuplicateIndex()
+    assert index.add(EXPLANATION, key='Neural')
+    assert index.add(EXPLANATION, key='Brains')
+
+
+def test_discard_source_allows_reindexing():
+    index = NearDuplicateIndex()
+    assert index.add(EXPLANATION, key='Neural', source='doc-1')
+    index.discard_source('doc-1')
+    assert len(index) == 0
+    assert index.add(EXPLANATION, key='Neural', source='doc-1')
+
+
+def test_unrelated_bank_has_no_false_hits_and_small_buckets():
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    index = NearDuplicateIndex()
+    rejected = 0
+    for i in range(3000):
+        sentence = ' '.join(rng.choice(vocabulary) for _ in range(15))
+        if not index.add(sentence, key=f"Concept{i % 20}"):
+            rejected += 1
+    assert rejected == 0
+    assert index.max_bucket_size() <= 2
+
+
+def test_max_entries_evicts_oldest():
+    index = NearDuplicateIndex(max_entries=2)
+    assert index.add(EXPLANATION, key='Neural', source='doc-1')
+    assert index.add(EXPLANATION, key='Brains', source='doc-2')
+    assert index.add(EXPLANATION, key='Tasks', source='doc-3')
+    assert len(index) == 2
+    assert not index.is_near_duplicate(EXPLANATION, key='Neural')
+    assert index.is_near_duplicate(EXPLANATION, key='Tasks')
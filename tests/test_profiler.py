@@ -0,0 +1,35 @@
+import os
+import threading
+from multiprocessing import Pool
+
+from utils.profiler import StackSampler, save_profile, recent_profiles
+
+
+def save_many(profile_dir, prefix, count, keep):
+    for i in range(count):
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+        sampler.stop()
+        save_profile(sampler, profile_dir, f'/{prefix}/{i}', keep=keep)
+
+
+def _worker(args):
+    save_many(*args)
+
+
+def test_retention_keeps_newest_profiles(tmp_path):
+    save_many(str(tmp_path), 'route', 12, keep=5)
+
+    assert [entry['route'] for entry in recent_profiles(str(tmp_path))] == [f'/route/{i}' for i in range(11, 6, -1)]
+    assert len(list(tmp_path.glob('*.collapsed'))) == 5
+
+
+def test_retention_holds_across_processes(tmp_path):
+    with Pool(4) as pool:
+        pool.map(_worker, [(str(tmp_path), f'worker{n}', 20, 8) for n in range(4)])
+
+    files = {path.name for path in tmp_path.glob('*.collapsed')}
+    assert len(files) == 8
+    assert {entry['file'] for entry in recent_profiles(str(tmp_path))} == files
+    with open(os.path.join(tmp_path, 'index.jsonl'), encoding='utf-8') as f:
+        assert len(f.readlines()) == 8
@@ -0,0 +1,94 @@
+import gzip
+
+import pytest
+
+pytest.importorskip("flask")
+
+from werkzeug.datastructures import Accept
+
+import app as core
+
+
+def make_document(document_id, count, nonce='n1', version=1):
+    questions = [{'question': f"Q{i}", 'answer': 'A', 'options': ['A'], 'explanation': 'E'} for i in range(count)]
+    core.document_data[document_id] = {
+        'content_analysis': {'key_concepts': ['Alpha']},
+        'nonce': nonce,
+        'generated_questions': {'basic': questions},
+        'versions': {'basic': version},
+    }
+    return questions
+
+
+@pytest.fixture
+def document():
+    make_document('doc-test', 45)
+    yield 'doc-test'
+    core.document_data.pop('doc-test', None)
+
+
+def test_parse_page_args_defaults_and_bounds():
+    assert core.parse_page_args({}) == (0, core.DEFAULT_PAGE_SIZE)
+    assert core.parse_page_args({'cursor': '-5', 'limit': '0'}) == (0, 1)
+    assert core.parse_page_args({'cursor': 'x', 'limit': 'y'}) == (0, core.DEFAULT_PAGE_SIZE)
+    assert core.parse_page_args({'cursor': '7', 'limit': '100000'}) == (7, core.MAX_PAGE_SIZE)
+
+
+def test_question_page_walks_cursor_to_the_end(document):
+    seen = []
+    cursor = 0
+    while cursor is not None:
+        _, payload = core.question_page(document, 'basic', {'cursor': cursor, 'limit': 20})
+        seen.extend(q['question'] for q in payload['questions'])
+        assert payload['total_count'] == 45
+        cursor = payload['next_cursor']
+    assert seen == [f"Q{i}" for i in range(45)]
+
+
+def test_question_page_past_the_end_is_empty(document):
+    _, payload = core.question_page(document, 'basic', {'cursor': 45})
+    assert payload['questions'] == []
+    assert payload['next_cursor'] is None
+
+
+def test_etag_changes_with_version_and_nonce(document):
+    etag, _ = core.question_page(document, 'basic', {})
+    core.document_data[document]['versions']['basic'] += 1
+    bumped, _ = core.question_page(document, 'basic', {})
+    make_document(document, 45, nonce='n2', version=1)
+    reinitialized, _ = core.question_page(document, 'basic', {})
+    assert len({etag, bumped, reinitialized}) == 3
+
+
+def test_if_none_match_returns_304_until_questions_change(document):
+    client = core.app.test_client()
+    first = client.get(f'/get_questions/{document}/basic')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    assert client.get(f'/get_questions/{document}/basic', headers={'If-None-Match': etag}).status_code == 304
+
+    core.document_data[document]['versions']['basic'] += 1
+    assert client.get(f'/get_questions/{document}/basic', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_compress_body_skips_small_bodies():
+    data = b'x' * (core.MIN_COMPRESS_SIZE - 1)
+    assert core.compress_body(data, Accept([('gzip', 1)])) == (data, None)
+
+
+def test_compress_body_uses_accepted_encoding():
+    data = b'{"q": "question"}' * 200
+    compressed, encoding = core.compress_body(data, Accept([('gzip', 1)]))
+    assert encoding == 'gzip'
+    assert gzip.decompress(compressed) == data
+    assert core.compress_body(data, Accept([])) == (data, None)
+
+
+def test_compress_body_prefers_brotli_when_available():
+    brotli = pytest.importorskip("brotli")
+    data = b'{"q": "question"}' * 200
+    compressed, encoding = core.compress_body(data, Accept([('gzip', 1), ('br', 1)]))
+    assert encoding == 'br'
+    assert brotli.decompress(compressed) == data
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("flask")
+
+import app as core
+
+ROUTING_A = ("Routing is the process of selecting a path for traffic in a network or between "
+             "multiple networks. Routing tables store the known routes for each destination.")
+ROUTING_B = ("Routing protocols such as OSPF exchange link state advertisements between routers. "
+             "Routing decisions are then made from the shortest path tree.")
+
+
+@pytest.fixture
+def cleanup():
+    document_ids = []
+    yield document_ids
+    for document_id in document_ids:
+        core.document_data.pop(document_id, None)
+    core.question_banks.clear()
+
+
+def initialize(text, document_id, collection, cleanup):
+    cleanup.append(document_id)
+    core.initialize_document_questions(core.analyze_document_content(text), document_id, collection=collection)
+    return core.document_data[document_id]['generated_questions']
+
+
+def test_more_questions_after_initialization(cleanup):
+    with open('test_document.txt', encoding='utf-8') as f:
+        initialize(f.read(), 'doc-more', 'user@example.com', cleanup)
+
+    for difficulty in ['basic', 'medium', 'advanced']:
+        payload = core.generate_more_questions('doc-more', difficulty)
+        assert len(payload['new_questions']) > 0
+
+
+def test_second_document_keeps_questions_on_a_shared_concept(cleanup):
+    initialize(ROUTING_A, 'doc-a', 'user@example.com', cleanup)
+    questions = initialize(ROUTING_B, 'doc-b', 'user@example.com', cleanup)
+
+    for difficulty in ['basic', 'medium', 'advanced']:
+        assert any(q['answer'] == 'Routing' for q in questions[difficulty])
+
+
+def test_same_evidence_is_skipped_only_within_a_collection(cleanup):
+    initialize(ROUTING_A, 'doc-a', 'first@example.com', cleanup)
+    repeated = initialize(ROUTING_A + " Extra closing words for a new id.", 'doc-a2', 'first@example.com', cleanup)
+    other_user = initialize(ROUTING_A + " Extra closing words for a new id.", 'doc-a3', 'second@example.com', cleanup)
+
+    assert not any(q['answer'] == 'Routing' for q in repeated['basic'])
+    assert any(q['answer'] == 'Routing' for q in other_user['basic'])
@@ -0,0 +1,95 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_P = W_NS + 'p'
+W_R = W_NS + 'r'
+W_T = W_NS + 't'
+W_TAB = W_NS + 'tab'
+W_BR = W_NS + 'br'
+W_CR = W_NS + 'cr'
+W_TC = W_NS + 'tc'
+MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+HEADER_PART = re.compile(r'word/header(\d*)\.xml$')
+
+
+def _iter_part_blocks(xml_file):
+    """Yield paragraph and table cell texts of one WordprocessingML part in document order
+
+    Elements are dropped from the tree as soon as they are closed, so memory
+    stays bounded by nesting depth rather than document size.
+    """
+    stack = []
+    paragraphs = []
+    cells = []
+    # Open runs per open paragraph; a text box paragraph sits inside a run of its host
+    run_depths = []
+    # Text boxes are written twice (mc:Choice and mc:Fallback); only the choice is read
+    fallback_depth = 0
+
+    for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            stack.append(elem)
+            if tag == MC_FALLBACK:
+                fallback_depth += 1
+            if fallback_depth:
+                continue
+            if tag == W_P:
+                paragraphs.append([])
+                run_depths.append(0)
+            elif tag == W_TC:
+                cells.append([])
+            elif tag == W_R and run_depths:
+                run_depths[-1] += 1
+            continue
+
+        stack.pop()
+        block = None
+        if tag == MC_FALLBACK or fallback_depth:
+            if tag == MC_FALLBACK:
+                fallback_depth -= 1
+        elif tag == W_T:
+            if paragraphs:
+                paragraphs[-1].append(elem.text or '')
+        elif tag == W_R:
+            if run_depths:
+                run_depths[-1] -= 1
+        elif tag == W_TAB:
+            # w:tab also defines tab stops in paragraph properties; only runs carry text
+            if run_depths and run_depths[-1]:
+                paragraphs[-1].append('\t')
+        elif tag in (W_BR, W_CR):
+            if run_depths and run_depths[-1]:
+                paragraphs[-1].append('\n')
+        elif tag == W_P:
+            block = ''.join(paragraphs.pop())
+            run_depths.pop()
+        elif tag == W_TC:
+            block = ' '.join(text for text in cells.pop() if text.strip())
+
+        if block is not None:
+            # Paragraphs (and nested tables) inside a cell are gathered into that cell's text
+            if cells:
+                cells[-1].append(block)
+            elif block.strip():
+                yield block
+
+        if stack:
+            stack[-1].remove(elem)
+
+
+def iter_docx_blocks(file_path):
+    """Stream text blocks (paragraphs and table cells) from a .docx, headers first"""
+    with zipfile.ZipFile(file_path) as archive:
+        names = archive.namelist()
+        parts = sorted(
+            (name for name in names if HEADER_PART.match(name)),
+            key=lambda name: int(HEADER_PART.match(name).group(1) or 0)
+        )
+        parts.append('word/document.xml')
+        for part in parts:
+            with archive.open(part) as xml_file:
+                yield from _iter_part_blocks(xml_file)
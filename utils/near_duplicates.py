@@ -0,0 +1,148 @@
+import hashlib
+import random
+import re
+import threading
+from array import array
+
+# Mersenne prime used for the universal hash family
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class NearDuplicateIndex:
+    """MinHash signatures bucketed with LSH so near-duplicate lookups only touch a few candidates
+
+    Entries are grouped by a key (the concept a question asks about) and compared
+    on the word shingles of their text (the explanation), so template wording
+    never contributes to similarity and different concepts never collide.
+
+    When max_entries is set, the oldest entries are evicted once the index is
+    full, so memory stays bounded however many questions pass through it.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.5, shingle_size=3, seed=42, max_entries=None):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+        self._buckets = {}
+        self._entries = {}
+        self._sources = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    def _shingles(self, text):
+        """Word n-grams of the normalized text"""
+        words = re.findall(r'\w+', text.lower())
+        if len(words) < self.shingle_size:
+            return {' '.join(words)} if words else set()
+        return {
+            ' '.join(words[i:i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def signature(self, text):
+        """Compute the MinHash signature of a piece of text"""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'big')
+            for s in self._shingles(text)
+        ]
+        if not hashes:
+            return array('I', [_MAX_HASH] * self.num_perm)
+        # 32-bit unsigned array: a quarter of the memory of a tuple of ints
+        return array('I', (
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        ))
+
+    def _band_keys(self, key, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield hash((key, band, tuple(signature[start:start + self.rows])))
+
+    def _similarity(self, sig_a, sig_b):
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / self.num_perm
+
+    def _find(self, key, signature):
+        seen = set()
+        for band_key in self._band_keys(key, signature):
+            for entry in self._buckets.get(band_key, ()):
+                if entry in seen:
+                    continue
+                seen.add(entry)
+                entry_key, _, entry_signature = self._entries[entry]
+                if entry_key == key and self._similarity(signature, entry_signature) >= self.threshold:
+                    return entry
+        return None
+
+    @staticmethod
+    def _normalize_key(key):
+        return (key or '').strip().lower()
+
+    def is_near_duplicate(self, text, key=None):
+        """Check whether an entry under the same key is estimated to be similar above the threshold"""
+        key = self._normalize_key(key)
+        signature = self.signature(text)
+        with self._lock:
+            return self._find(key, signature) is not None
+
+    def add(self, text, key=None, source=None):
+        """Index text under key unless a near duplicate exists; returns True when it was added"""
+        key = self._normalize_key(key)
+        signature = self.signature(text)
+        with self._lock:
+            if self._find(key, signature) is not None:
+                return False
+            entry = self._next_key
+            self._next_key += 1
+            self._entries[entry] = (key, source, signature)
+            for band_key in self._band_keys(key, signature):
+                self._buckets.setdefault(band_key, []).append(entry)
+            self._sources.setdefault(source, set()).add(entry)
+
+            # Entries are kept in insertion order, so the first ones are the oldest
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            return True
+
+    def _remove(self, entry):
+        key, source, signature = self._entries.pop(entry)
+        for band_key in self._band_keys(key, signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is None:
+                continue
+            try:
+                bucket.remove(entry)
+            except ValueError:
+                pass
+            if not bucket:
+                del self._buckets[band_key]
+        entries = self._sources.get(source)
+        if entries is not None:
+            entries.discard(entry)
+            if not entries:
+                del self._sources[source]
+
+    def discard_source(self, source):
+        """Remove every entry added for a source, e.g. when a document is re-analyzed"""
+        with self._lock:
+            for entry in list(self._sources.get(source, ())):
+                self._remove(entry)
+
+    def max_bucket_size(self):
+        """Size of the largest LSH bucket, a measure of worst-case lookup cost"""
+        with self._lock:
+            return max((len(bucket) for bucket in self._buckets.values()), default=0)
+
+    def __len__(self):
+        return len(self._entries)
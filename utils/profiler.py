@@ -0,0 +1,151 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INDEX_FILE = 'index.jsonl'
+LOCK_FILE = 'index.lock'
+
+
+class StackSampler(threading.Thread):
+    """Samples the call stack of one thread at a fixed interval"""
+
+    def __init__(self, thread_id, interval=0.005):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.started_at = None
+        self.duration = 0.0
+
+    @staticmethod
+    def _label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        super().start()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def collapsed(self):
+        """Stacks in collapsed format (root;...;leaf count), readable by speedscope and flamegraph.pl"""
+        return "\n".join(
+            f"{';'.join(stack)} {count}"
+            for stack, count in self.stacks.most_common()
+        )
+
+
+@contextmanager
+def _index_lock(profile_dir):
+    """Exclusive lock shared by every worker process touching the profile index
+
+    A separate lock file is used because pruning replaces the index file itself.
+    """
+    with open(os.path.join(profile_dir, LOCK_FILE), 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def save_profile(sampler, profile_dir, route, keep=200):
+    """Write a finished sampler to profile_dir, append it to the index and apply retention"""
+    os.makedirs(profile_dir, exist_ok=True)
+    slug = route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'root'
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}-{slug}.collapsed"
+    with open(os.path.join(profile_dir, filename), 'w', encoding='utf-8') as f:
+        f.write(sampler.collapsed())
+
+    entry = {
+        'file': filename,
+        'route': route,
+        'duration_ms': round(sampler.duration * 1000, 1),
+        'samples': sum(sampler.stacks.values()),
+        'created': time.time()
+    }
+    # One JSON line per profile; appending and pruning happen under one lock so
+    # no worker's entry is lost when another rewrites the index
+    with _index_lock(profile_dir):
+        with open(os.path.join(profile_dir, INDEX_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+        _prune_index(profile_dir, keep)
+    return entry
+
+
+def prune_profiles(profile_dir, keep):
+    """Keep the newest `keep` profiles, deleting older files and trimming the index"""
+    with _index_lock(profile_dir):
+        _prune_index(profile_dir, keep)
+
+
+def _prune_index(profile_dir, keep):
+    index_path = os.path.join(profile_dir, INDEX_FILE)
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return
+    if len(lines) <= keep:
+        return
+
+    dropped, kept = lines[:-keep], lines[-keep:]
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.writelines(kept)
+    os.replace(tmp_path, index_path)
+
+    for line in dropped:
+        try:
+            os.remove(os.path.join(profile_dir, json.loads(line)['file']))
+        except (ValueError, KeyError, OSError):
+            pass
+
+
+def recent_profiles(profile_dir, limit=50):
+    """Most recent index entries whose profile file still exists, newest first"""
+    try:
+        with open(os.path.join(profile_dir, INDEX_FILE), encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return []
+
+    entries = []
+    for line in reversed(lines):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if os.path.exists(os.path.join(profile_dir, entry['file'])):
+            entries.append(entry)
+            if len(entries) >= limit:
+                break
+    return entries